@@ -42,6 +42,21 @@ class Config:
         "min_pages": {"undergraduate": 50, "master": 80, "phd": 120}
     }
     
+    # Template Similarity Index
+    # Model default memotong input di 128 token (max_seq_length), sehingga
+    # tiap bagian dipecah per EMBEDDING_CHUNK_WORDS kata lalu di-mean-pool.
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+    EMBEDDING_CHUNK_WORDS = 80
+    EMBEDDING_MAX_CHUNKS = 64  # Per bagian, diambil merata sepanjang bagian
+    VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", "reference_docs/vector_index")  # Relatif ke root proyek
+    EMBEDDING_BATCH_SIZE = 32
+    # Belum dikalibrasi terhadap template asli; sesuaikan lewat env setelah
+    # melihat sebaran skor. Bagian di bawah ambang ini dianalisis LLM, dibatasi
+    # MAX_LLM_SECTIONS bagian terendah dalam satu panggilan.
+    SECTION_SIMILARITY_THRESHOLD = float(os.getenv("SECTION_SIMILARITY_THRESHOLD", "0.6"))
+    MAX_LLM_SECTIONS = 5
+    LLM_SECTION_CHARS = 1500
+    
     # LLM Prompts
     DOCUMENT_ANALYSIS_PROMPT = """
     Anda adalah sistem otomatis untuk memeriksa format dokumen tugas akhir mahasiswa.
@@ -33,6 +33,10 @@ def convert_objectid(obj):
     else:
         return obj
 
+def extract_template_text(template_path):
+    template_text, _ = pdf_processor.extract_text_from_pdf(template_path)
+    return template_text
+
 @app.route("/")
 def index():
     """Home page untuk upload dokumen"""
@@ -80,11 +84,13 @@ def check_document():
         # Extract text and metadata
         extracted_text, pdf_metadata = pdf_processor.extract_text_from_pdf(file_path)
         
-        # Load template for comparison (optional)
-        template_text = ""
+        # Index template hanya dibangun ulang jika file template berubah
         template_path = "reference_docs/template_ta.pdf"
         if os.path.exists(template_path):
-            template_text, _ = pdf_processor.extract_text_from_pdf(template_path)
+            try:
+                checker.template_index.sync_template(template_path, extract_template_text)
+            except Exception as e:
+                logging.error(f"Error indexing template, using existing index: {e}")
         
         # Analyze document format
         format_analysis = checker.analyze_document_structure(extracted_text)
@@ -94,8 +100,8 @@ def check_document():
         
         # Compare with template if available
         template_comparison = {}
-        if template_text:
-            template_comparison = checker.compare_with_template(extracted_text, template_text)
+        if os.path.exists(template_path) and not checker.template_index.is_empty():
+            template_comparison = checker.compare_with_template(extracted_text)
         
         # Prepare result
         result = {
@@ -163,7 +169,24 @@ def upload_template():
         os.makedirs("reference_docs", exist_ok=True)
         shutil.move(template_path, final_path)
         
-        return jsonify({"success": True, "message": "Template uploaded successfully"})
+        # Embed bagian-bagian template ke index vektor lokal
+        try:
+            indexed_sections = checker.template_index.sync_template(final_path, extract_template_text)
+        except Exception as e:
+            logging.error(f"Error indexing template: {e}")
+            return jsonify({
+                "success": True,
+                "message": "Template uploaded, but indexing failed; it will be retried on the next check",
+                "indexed": False,
+                "indexing_error": str(e)
+            })
+        
+        return jsonify({
+            "success": True,
+            "message": "Template uploaded successfully",
+            "indexed": True,
+            "indexed_sections": indexed_sections
+        })
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
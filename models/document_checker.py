@@ -6,6 +6,7 @@ import json
 import re
 import os
 from utils.pdf_processor import PDFProcessor
+from utils.template_index import TemplateIndex
 
 class ThesisFormatChecker:
     def __init__(self):
@@ -16,6 +17,9 @@ class ThesisFormatChecker:
         )
         self.required_sections = Config.REQUIRED_SECTIONS
         self.format_rules = Config.FORMAT_RULES
+        vector_db_path = os.path.join(os.path.dirname(__file__), "..", Config.VECTOR_DB_PATH)
+        self.template_index = TemplateIndex(db_path=os.path.normpath(vector_db_path))
+        self.similarity_threshold = Config.SECTION_SIMILARITY_THRESHOLD
         
         # Load format guide JSON
         format_guide_path = os.path.join(os.path.dirname(__file__), "../reference_docs/format_guide.json")
@@ -140,25 +144,84 @@ class ThesisFormatChecker:
 
         return issues
     
-    def compare_with_template(self, student_text: str, template_text: str) -> Dict:
-        """Bandingkan dengan dokumen template"""
-        prompt = f"""
-        Bandingkan struktur dokumen mahasiswa dengan template yang benar.
+    def compare_with_template(self, student_text: str) -> Dict:
+        """Bandingkan tiap bagian dokumen dengan template lewat index embedding"""
+        try:
+            scored_sections = self.template_index.score_sections(student_text)
+        except Exception as e:
+            logging.error(f"Error in template comparison: {e}")
+            return {"error": f"Error in comparison: {e}"}
+        
+        # LLM hanya dipakai untuk bagian dengan skor terendah, dalam satu panggilan
+        low_scoring = sorted(
+            (s for s in scored_sections if s["found"] and s["similarity"] < self.similarity_threshold),
+            key=lambda s: s["similarity"]
+        )[:Config.MAX_LLM_SECTIONS]
+        analyses = self._analyze_section_differences(low_scoring) if low_scoring else {}
         
+        sections = []
+        for scored in scored_sections:
+            section = {
+                "section": scored["section"],
+                "similarity": scored["similarity"],
+                "status": "SESUAI"
+            }
+            if not scored["found"]:
+                section["status"] = "TIDAK_DITEMUKAN"
+            elif scored["similarity"] < self.similarity_threshold:
+                section["status"] = "PERLU_PERBAIKAN"
+                if scored["section"] in analyses:
+                    section["analysis"] = analyses[scored["section"]]
+            sections.append(section)
+        
+        similarity_score = 0
+        if sections:
+            similarity_score = int(sum(s["similarity"] for s in sections) / len(sections) * 100)
+        
+        return {
+            "similarity_score": max(similarity_score, 0),
+            "threshold": self.similarity_threshold,
+            "sections": sections
+        }
+    
+    def _analyze_section_differences(self, scored_sections: List[Dict]) -> Dict[str, str]:
+        """Analisis LLM untuk bagian-bagian yang kurang mirip dengan template"""
+        limit = Config.LLM_SECTION_CHARS
+        section_blocks = "\n".join(
+            f"""
+        === {s["section"]} ===
         TEMPLATE YANG BENAR:
-        {template_text[:4000]}
+        {s["template_text"][:limit]}
         
         DOKUMEN MAHASISWA:
-        {student_text[:4000]}
+        {s["student_text"][:limit]}
+        """
+            for s in scored_sections
+        )
+        prompt = f"""
+        Bagian-bagian berikut pada dokumen mahasiswa kurang sesuai dengan template.
+        {section_blocks}
         
-        Berikan analisis perbandingan dan skor kemiripan struktur (0-100).
+        Untuk tiap bagian, jelaskan secara singkat perbedaan struktur dan rekomendasi perbaikannya.
+        Jawab dalam format JSON dengan nama bagian sebagai key dan penjelasan (bahasa Indonesia) sebagai value.
         """
         
         try:
             response = self.llm.invoke(prompt)
-            return {"comparison_analysis": response.content}
         except Exception as e:
-            return {"comparison_analysis": f"Error in comparison: {e}"}
+            logging.error(f"Error in section analysis: {e}")
+            return {s["section"]: f"Error in section analysis: {e}" for s in scored_sections}
+        
+        try:
+            json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
+            data = json.loads(json_match.group()) if json_match else {}
+        except ValueError:
+            data = {}
+        analyses = {s["section"]: str(data[s["section"]]) for s in scored_sections if s["section"] in data}
+        if not analyses:
+            # Respons tidak terstruktur: simpan apa adanya di tiap bagian
+            analyses = {s["section"]: response.content for s in scored_sections}
+        return analyses
     
     def _extract_score(self, text: str) -> int:
         """Extract score dari response text"""
@@ -0,0 +1,280 @@
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+# Model embedding, Chroma dan Groq diganti stub agar test berjalan offline
+for module_name in ("chromadb", "sentence_transformers", "langchain_groq"):
+    try:
+        importlib.import_module(module_name)
+    except ImportError:
+        sys.modules[module_name] = mock.MagicMock()
+
+import chromadb
+
+from config.settings import Config
+from models.document_checker import ThesisFormatChecker
+from utils.template_index import TemplateIndex
+
+CHROMADB_STUBBED = isinstance(chromadb, mock.MagicMock)
+
+SAMPLE_THESIS = """
+--- PAGE 1 ---
+HALAMAN JUDUL
+Sistem Pemeriksa Format Tugas Akhir
+--- PAGE 2 ---
+LEMBAR PENGESAHAN
+Disetujui oleh pembimbing.
+--- PAGE 3 ---
+ABSTRAK
+Penelitian ini membahas pemeriksaan format.
+--- PAGE 4 ---
+ABSTRACT
+This research discusses format checking.
+--- PAGE 5 ---
+KATA PENGANTAR
+Puji syukur penulis panjatkan.
+--- PAGE 6 ---
+DAFTAR ISI
+LEMBAR PENGESAHAN ........ ii
+ABSTRAK ........ iii
+ABSTRACT ........ iv
+KATA PENGANTAR ........ v
+BAB I PENDAHULUAN 1
+DAFTAR PUSTAKA 40
+LAMPIRAN 45
+--- PAGE 7 ---
+BAB I
+PENDAHULUAN
+Latar belakang masalah dijelaskan pada bagian ini dan abstrak.
+Lampiran 1 Kuesioner dibahas kemudian.
+--- PAGE 8 ---
+DAFTAR PUSTAKA
+Sugiyono. 2019. Metode Penelitian.
+--- PAGE 9 ---
+LAMPIRAN
+Kuesioner penelitian.
+"""
+
+
+class FakeModel:
+    """Embedding deterministik: vektor frekuensi huruf per potongan"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            vector = np.zeros(26)
+            for char in text.lower():
+                if "a" <= char <= "z":
+                    vector[ord(char) - ord("a")] += 1
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return np.array(vectors)
+
+
+def make_index():
+    with mock.patch("utils.template_index.chromadb"):
+        index = TemplateIndex(db_path="unused")
+    index._model = FakeModel()
+    return index
+
+
+class TestSplitSections(unittest.TestCase):
+    def setUp(self):
+        self.sections = make_index().split_sections(SAMPLE_THESIS)
+
+    def test_front_matter_uses_real_headings_not_toc(self):
+        self.assertEqual(self.sections["LEMBAR PENGESAHAN"], "Disetujui oleh pembimbing.")
+        self.assertEqual(self.sections["ABSTRACT"], "This research discusses format checking.")
+        self.assertEqual(self.sections["KATA PENGANTAR"], "Puji syukur penulis panjatkan.")
+        self.assertEqual(self.sections["HALAMAN JUDUL"], "Sistem Pemeriksa Format Tugas Akhir")
+
+    def test_toc_kept_as_daftar_isi_content(self):
+        self.assertIn("ABSTRAK ........ iii", self.sections["DAFTAR ISI"])
+        self.assertIn("LAMPIRAN 45", self.sections["DAFTAR ISI"])
+
+    def test_body_mentions_do_not_start_sections(self):
+        self.assertEqual(self.sections["ABSTRAK"], "Penelitian ini membahas pemeriksaan format.")
+        self.assertIn("Lampiran 1 Kuesioner", self.sections["BAB I PENDAHULUAN"])
+        self.assertEqual(self.sections["LAMPIRAN"], "Kuesioner penelitian.")
+
+    def test_page_markers_removed(self):
+        for content in self.sections.values():
+            self.assertNotIn("--- PAGE", content)
+
+    def test_heading_split_over_two_lines(self):
+        self.assertTrue(self.sections["BAB I PENDAHULUAN"].startswith("Latar belakang"))
+
+    def test_sections_out_of_order(self):
+        text = "DAFTAR PUSTAKA\nReferensi.\nABSTRAK\nRingkasan.\nBAB I PENDAHULUAN\nLatar belakang."
+        sections = make_index().split_sections(text)
+        self.assertEqual(sections, {
+            "DAFTAR PUSTAKA": "Referensi.",
+            "ABSTRAK": "Ringkasan.",
+            "BAB I PENDAHULUAN": "Latar belakang."
+        })
+
+    def test_heading_inside_longer_word_ignored(self):
+        sections = make_index().split_sections("ABSTRAKSI\nBukan abstrak.\nABSTRAK\nIsi.")
+        self.assertEqual(sections, {"ABSTRAK": "Isi."})
+
+
+class TestEmbedSections(unittest.TestCase):
+    def test_long_section_chunked_in_one_batch_and_pooled(self):
+        index = make_index()
+        index.chunk_words = 3
+        pooled = index.embed_sections({"ABSTRAK": "satu dua tiga empat lima", "LAMPIRAN": "enam"})
+
+        self.assertEqual(index._model.calls, [["satu dua tiga", "empat lima", "enam"]])
+        for vector in pooled.values():
+            self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0)
+
+    def test_chunks_capped_across_whole_section(self):
+        index = make_index()
+        index.chunk_words = 1
+        index.max_chunks = 3
+        self.assertEqual(index.chunk_text("a b c d e"), ["a", "c", "e"])
+
+    def test_failed_embedding_keeps_existing_index(self):
+        index = make_index()
+        existing = index.collection
+        index._model.encode = mock.MagicMock(side_effect=RuntimeError("download failed"))
+
+        with self.assertRaises(RuntimeError):
+            index.index_template(SAMPLE_THESIS, "new-template")
+        index.client.delete_collection.assert_not_called()
+        self.assertIs(index.collection, existing)
+
+
+@unittest.skipIf(CHROMADB_STUBBED, "chromadb tidak terpasang")
+class TestTemplateIndexPersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "vector_index")
+        self.template_path = os.path.join(self.tmpdir.name, "template_ta.pdf")
+        with open(self.template_path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE_THESIS)
+        self.extract_text = mock.MagicMock(return_value=SAMPLE_THESIS)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_index(self):
+        index = TemplateIndex(db_path=self.db_path)
+        index._model = FakeModel()
+        return index
+
+    def test_template_embedded_once_across_restarts(self):
+        index = self.make_index()
+        indexed = index.sync_template(self.template_path, self.extract_text)
+        self.assertEqual(indexed, len(index.split_sections(SAMPLE_THESIS)))
+        self.assertIsNone(index.sync_template(self.template_path, self.extract_text))
+
+        restarted = self.make_index()
+        self.assertIsNone(restarted.sync_template(self.template_path, self.extract_text))
+        self.assertEqual(self.extract_text.call_count, 1)
+        self.assertEqual(restarted._model.calls, [])
+
+        results = restarted.score_sections(SAMPLE_THESIS)
+        self.assertEqual(len(results), indexed)
+        for result in results:
+            self.assertTrue(result["found"])
+            self.assertAlmostEqual(result["similarity"], 1.0, places=3)
+
+    def test_rebuild_replaces_old_sections(self):
+        index = self.make_index()
+        index.index_template(SAMPLE_THESIS, "lama")
+        index.index_template("ABSTRAK\nRingkasan baru.", "baru")
+
+        restarted = self.make_index()
+        self.assertEqual(restarted.indexed_source(), "baru")
+        results = restarted.score_sections("ABSTRAK\nRingkasan baru.")
+        self.assertEqual([r["section"] for r in results], ["ABSTRAK"])
+        self.assertEqual(results[0]["template_text"], "Ringkasan baru.")
+
+    def test_template_without_sections_not_reindexed(self):
+        index = self.make_index()
+        self.extract_text.return_value = "Tidak ada judul bagian."
+        self.assertEqual(index.sync_template(self.template_path, self.extract_text), 0)
+        self.assertTrue(index.is_empty())
+        self.assertIsNone(index.sync_template(self.template_path, self.extract_text))
+
+    def test_unknown_indexed_sections_ignored(self):
+        index = self.make_index()
+        index.index_template(SAMPLE_THESIS, "lama")
+        index.section_names = ["ABSTRAK", "LAMPIRAN"]
+        results = index.score_sections(SAMPLE_THESIS)
+        self.assertEqual([r["section"] for r in results], ["ABSTRAK", "LAMPIRAN"])
+
+
+class TestCompareWithTemplate(unittest.TestCase):
+    def setUp(self):
+        with mock.patch("models.document_checker.TemplateIndex"), \
+                mock.patch("models.document_checker.ChatGroq"):
+            self.checker = ThesisFormatChecker()
+        self.checker.similarity_threshold = 0.6
+        self.checker.llm = mock.MagicMock()
+        self.checker.llm.invoke.return_value.content = '{"BAB I PENDAHULUAN": "Analisis bagian"}'
+        self.checker.template_index.score_sections.return_value = [
+            {"section": "ABSTRAK", "found": True, "similarity": 0.9,
+             "student_text": "a", "template_text": "a"},
+            {"section": "BAB I PENDAHULUAN", "found": True, "similarity": 0.3,
+             "student_text": "b", "template_text": "c"},
+            {"section": "LAMPIRAN", "found": False, "similarity": 0.0,
+             "student_text": "", "template_text": "d"},
+        ]
+
+    def test_section_statuses(self):
+        result = self.checker.compare_with_template("dokumen")
+        statuses = {s["section"]: s["status"] for s in result["sections"]}
+        self.assertEqual(statuses, {
+            "ABSTRAK": "SESUAI",
+            "BAB I PENDAHULUAN": "PERLU_PERBAIKAN",
+            "LAMPIRAN": "TIDAK_DITEMUKAN"
+        })
+
+    def test_llm_only_called_below_threshold(self):
+        result = self.checker.compare_with_template("dokumen")
+        self.assertEqual(self.checker.llm.invoke.call_count, 1)
+        prompt = self.checker.llm.invoke.call_args[0][0]
+        self.assertIn("=== BAB I PENDAHULUAN ===", prompt)
+        self.assertNotIn("=== ABSTRAK ===", prompt)
+        analyses = {s["section"]: s["analysis"] for s in result["sections"] if "analysis" in s}
+        self.assertEqual(analyses, {"BAB I PENDAHULUAN": "Analisis bagian"})
+
+    def test_no_llm_call_when_all_sections_match(self):
+        for scored in self.checker.template_index.score_sections.return_value:
+            scored["similarity"] = 0.9
+        self.checker.compare_with_template("dokumen")
+        self.checker.llm.invoke.assert_not_called()
+
+    def test_low_sections_batched_into_one_capped_call(self):
+        self.checker.template_index.score_sections.return_value = [
+            {"section": f"BAGIAN {n}", "found": True, "similarity": n / 100,
+             "student_text": "a", "template_text": "b"}
+            for n in range(10)
+        ]
+        self.checker.llm.invoke.return_value.content = "Penjelasan bebas"
+        with mock.patch.object(Config, "MAX_LLM_SECTIONS", 3):
+            result = self.checker.compare_with_template("dokumen")
+
+        self.assertEqual(self.checker.llm.invoke.call_count, 1)
+        analysed = [s["section"] for s in result["sections"] if "analysis" in s]
+        self.assertEqual(analysed, ["BAGIAN 0", "BAGIAN 1", "BAGIAN 2"])
+        self.assertEqual(result["sections"][0]["analysis"], "Penjelasan bebas")
+
+    def test_missing_sections_count_as_zero(self):
+        result = self.checker.compare_with_template("dokumen")
+        self.assertEqual(result["similarity_score"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+import logging
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+import chromadb
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config.settings import Config
+
+# Baris Daftar Isi: diakhiri titik-titik pemandu dan/atau nomor halaman
+TOC_LINE_PATTERN = re.compile(r'(\.{2,}|…)\s*\S*$|\s(\d+|[ivxlcdm]+)$')
+PAGE_MARKER_PATTERN = re.compile(r'^--- PAGE \d+ ---$', re.M)
+
+class TemplateIndex:
+    """Index vektor lokal untuk bagian-bagian dokumen template"""
+
+    COLLECTION_NAME = "template_sections"
+    STAGING_COLLECTION_NAME = "template_sections_staging"
+
+    def __init__(self, db_path: str = None, model_name: str = None):
+        self.db_path = db_path or Config.VECTOR_DB_PATH
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        self.batch_size = Config.EMBEDDING_BATCH_SIZE
+        self.chunk_words = Config.EMBEDDING_CHUNK_WORDS
+        self.max_chunks = Config.EMBEDDING_MAX_CHUNKS
+        self.section_names = Config.REQUIRED_SECTIONS
+        self._model = None
+        self._lock = threading.RLock()
+
+        self.client = chromadb.PersistentClient(path=self.db_path)
+        # get_or_create_collection akan menimpa metadata (termasuk template_source)
+        try:
+            self.collection = self.client.get_collection(self.COLLECTION_NAME)
+        except ValueError:
+            self.collection = self.client.create_collection(
+                name=self.COLLECTION_NAME,
+                metadata={"hnsw:space": "cosine"}
+            )
+
+    @property
+    def model(self) -> SentenceTransformer:
+        """Load model embedding saat pertama kali dibutuhkan"""
+        if self._model is None:
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self.collection.count() == 0
+
+    def indexed_source(self) -> str:
+        """Penanda file template yang terakhir di-index"""
+        with self._lock:
+            return (self.collection.metadata or {}).get("template_source", "")
+
+    @staticmethod
+    def source_id(template_path: str) -> str:
+        stat = os.stat(template_path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def split_sections(self, text: str) -> Dict[str, str]:
+        """Pecah teks dokumen per bagian berdasarkan judul bagian wajib"""
+        text = PAGE_MARKER_PATTERN.sub('', text)
+        lines = [re.sub(r'\s+', ' ', line).strip() for line in text.splitlines()]
+        patterns = {
+            section: re.compile(r'^' + r' '.join(re.escape(word) for word in section.split()) + r'$')
+            for section in self.section_names
+        }
+
+        # Judul harus satu baris utuh (atau dua baris, mis. "BAB I" / "PENDAHULUAN");
+        # kemunculan pertama dipakai, entri Daftar Isi dilewati
+        headings = []
+        found = set()
+        i = 0
+        while i < len(lines):
+            matched = None
+            if lines[i] and not TOC_LINE_PATTERN.search(lines[i]):
+                candidates = [(lines[i].upper(), 1)]
+                if i + 1 < len(lines) and lines[i + 1] and not TOC_LINE_PATTERN.search(lines[i + 1]):
+                    candidates.append((f"{lines[i]} {lines[i + 1]}".upper(), 2))
+                for section, pattern in patterns.items():
+                    if section in found:
+                        continue
+                    span = next((span for candidate, span in candidates if pattern.match(candidate)), None)
+                    if span:
+                        matched = (section, span)
+                        break
+            if matched:
+                section, span = matched
+                found.add(section)
+                headings.append((i, i + span, section))
+                i += span
+            else:
+                i += 1
+
+        sections = {}
+        for n, (_, content_start, section) in enumerate(headings):
+            content_end = headings[n + 1][0] if n + 1 < len(headings) else len(lines)
+            content = "\n".join(line for line in lines[content_start:content_end] if line)
+            if content:
+                sections[section] = content
+        return sections
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Pecah teks agar tiap potongan muat dalam batas token model"""
+        words = text.split()
+        chunks = [
+            " ".join(words[start:start + self.chunk_words])
+            for start in range(0, len(words), self.chunk_words)
+        ]
+        if len(chunks) > self.max_chunks:
+            picks = np.linspace(0, len(chunks) - 1, self.max_chunks).round().astype(int)
+            chunks = [chunks[p] for p in picks]
+        return chunks
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embedding teks secara batch di CPU (vektor ternormalisasi)"""
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    def embed_sections(self, sections: Dict[str, str]) -> Dict[str, np.ndarray]:
+        """Embedding semua potongan dalam satu batch, lalu mean-pool per bagian"""
+        owners, chunks = [], []
+        for name, content in sections.items():
+            for chunk in self.chunk_text(content):
+                owners.append(name)
+                chunks.append(chunk)
+        if not chunks:
+            return {}
+
+        chunk_embeddings = np.asarray(self.embed(chunks))
+        owners = np.asarray(owners)
+        pooled = {}
+        for name in sections:
+            vector = chunk_embeddings[owners == name].mean(axis=0)
+            norm = np.linalg.norm(vector)
+            pooled[name] = vector / norm if norm else vector
+        return pooled
+
+    def index_template(self, template_text: str, source_id: str = "") -> int:
+        """Bangun ulang index dari teks template, kembalikan jumlah bagian"""
+        sections = self.split_sections(template_text)
+        # Embedding dulu; index lama baru diganti setelah ini berhasil
+        embeddings = self.embed_sections(sections)
+        names = list(embeddings.keys())
+
+        with self._lock:
+            try:
+                self.client.delete_collection(self.STAGING_COLLECTION_NAME)
+            except ValueError:
+                pass
+            staging = self.client.create_collection(
+                name=self.STAGING_COLLECTION_NAME,
+                metadata={"hnsw:space": "cosine", "template_source": source_id}
+            )
+            if names:
+                staging.add(
+                    ids=names,
+                    embeddings=[embeddings[name].tolist() for name in names],
+                    documents=[sections[name] for name in names],
+                    metadatas=[{"section": name} for name in names]
+                )
+
+            try:
+                self.client.delete_collection(self.COLLECTION_NAME)
+            except ValueError:
+                pass
+            staging.modify(name=self.COLLECTION_NAME)
+            self.collection = staging
+
+        if not names:
+            logging.warning("No sections found in template, index left empty")
+        else:
+            logging.info(f"Indexed {len(names)} template sections")
+        return len(names)
+
+    def sync_template(self, template_path: str, extract_text: Callable[[str], str]) -> Optional[int]:
+        """Index ulang hanya jika file template berubah sejak index terakhir"""
+        source_id = self.source_id(template_path)
+        with self._lock:
+            if self.indexed_source() == source_id:
+                return None
+            return self.index_template(extract_text(template_path), source_id)
+
+    def score_sections(self, student_text: str) -> List[Dict]:
+        """Hitung skor kemiripan tiap bagian dokumen mahasiswa terhadap template"""
+        with self._lock:
+            stored = self.collection.get(include=["embeddings", "documents"])
+        # Bagian yang sudah tidak ada di REQUIRED_SECTIONS diabaikan
+        template = {"ids": [], "embeddings": [], "documents": []}
+        for name, embedding, document in zip(stored["ids"], stored["embeddings"], stored["documents"]):
+            if name in self.section_names:
+                template["ids"].append(name)
+                template["embeddings"].append(embedding)
+                template["documents"].append(document)
+        if not template["ids"]:
+            return []
+
+        student_sections = self.split_sections(student_text)
+        student_embeddings = self.embed_sections({
+            name: student_sections[name] for name in template["ids"] if name in student_sections
+        })
+        similarities = {}
+        for name, embedding in zip(template["ids"], template["embeddings"]):
+            if name in student_embeddings:
+                similarities[name] = float(np.dot(student_embeddings[name], np.asarray(embedding)))
+
+        results = []
+        for name, template_section in zip(template["ids"], template["documents"]):
+            results.append({
+                "section": name,
+                "found": name in student_sections,
+                "similarity": round(similarities.get(name, 0.0), 4),
+                "student_text": student_sections.get(name, ""),
+                "template_text": template_section
+            })
+        results.sort(key=lambda r: self.section_names.index(r["section"]))
+        return results